@@ -0,0 +1,11 @@
+import os
+
+import uvicorn
+
+uvicorn.run(
+    "app:app",
+    host=os.getenv("HOST", "0.0.0.0"),
+    port=int(os.getenv("PORT", "8000")),
+    loop="uvloop",
+    http="httptools",
+)
@@ -0,0 +1,21 @@
+import os, asyncio
+
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+import httpx
+
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "20"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+
+http_transport = httpx.AsyncHTTPTransport(
+    http2=True,
+    retries=0,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=60),
+)
+
+client = AsyncOpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=DefaultAsyncHttpxClient(transport=http_transport),
+    max_retries=OPENAI_MAX_RETRIES,
+)
+
+OPENAI_SEM = asyncio.Semaphore(OPENAI_CONCURRENCY)
@@ -0,0 +1,265 @@
+import os, time, base64, asyncio, random
+from typing import Optional, Dict, Any, Awaitable, Callable, TextIO
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .clients import http_transport
+
+GH_TOKEN  = os.getenv("GITHUB_TOKEN")
+GH_OWNER  = os.getenv("GH_OWNER")
+GH_REPO   = os.getenv("GH_REPO")
+GH_PATH   = os.getenv("GH_PATH", "logs.csv")
+GH_BRANCH = os.getenv("GH_BRANCH", "main")
+
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "30"))
+LOG_FLUSH_ROWS     = int(os.getenv("LOG_FLUSH_ROWS", "50"))
+# Rows not yet pushed to GitHub are kept here so a restart does not lose them.
+# The spool belongs to one process: it is locked with flock, and workers that
+# cannot take the lock (or platforms without fcntl) run without a spool.
+LOG_SPOOL_PATH     = os.getenv("LOG_SPOOL_PATH", "logs.spool")
+
+GH_RETRY_STATUS  = {403, 429, 500, 502, 503, 504}
+GH_BACKOFF_BASE  = 1.0
+GH_BACKOFF_CAP   = 60.0
+
+def _gh_headers():
+    return {
+        "Authorization": f"Bearer {GH_TOKEN}",
+        "Accept": "application/vnd.github+json"
+    }
+
+gh_client = httpx.AsyncClient(
+    base_url="https://api.github.com",
+    headers=_gh_headers(),
+    timeout=10,
+    transport=http_transport,
+)
+
+def _contents_url() -> str:
+    return f"/repos/{GH_OWNER}/{GH_REPO}/contents/{GH_PATH}"
+
+def _backoff_delay(attempt: int, resp: Optional[httpx.Response] = None) -> float:
+    if resp is not None:
+        retry_after = resp.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(GH_BACKOFF_CAP, float(retry_after))
+            except ValueError:
+                pass
+        reset = resp.headers.get("x-ratelimit-reset")
+        if reset and resp.headers.get("x-ratelimit-remaining") == "0":
+            try:
+                return min(GH_BACKOFF_CAP, max(0.0, float(reset) - time.time()))
+            except ValueError:
+                pass
+    return min(GH_BACKOFF_CAP, GH_BACKOFF_BASE * 2 ** attempt) + random.random()
+
+def _should_retry(resp: httpx.Response) -> bool:
+    if resp.status_code not in GH_RETRY_STATUS:
+        return False
+    if resp.status_code == 403:
+        return "retry-after" in resp.headers or resp.headers.get("x-ratelimit-remaining") == "0"
+    return True
+
+async def _with_backoff(call: Callable[[], Awaitable[httpx.Response]], max_attempts: int = 6) -> httpx.Response:
+    for attempt in range(max_attempts):
+        last = attempt == max_attempts - 1
+        try:
+            resp = await call()
+        except httpx.TransportError as e:
+            if last:
+                raise
+            print("[logs->github] transport error:", e)
+            await asyncio.sleep(_backoff_delay(attempt))
+            continue
+        if last or not _should_retry(resp):
+            return resp
+        delay = _backoff_delay(attempt, resp)
+        print("[logs->github] retry:", resp.status_code, f"in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+async def _get_contents():
+    return await _with_backoff(lambda: gh_client.get(_contents_url(), params={"ref": GH_BRANCH}))
+
+async def _get_blob(sha: str):
+    return await _with_backoff(lambda: gh_client.get(
+        f"/repos/{GH_OWNER}/{GH_REPO}/git/blobs/{sha}",
+        headers={"Accept": "application/vnd.github.raw"},
+    ))
+
+async def _put_contents(content_b64: str, sha: Optional[str], message: str):
+    payload = {
+        "message": message,
+        "content": content_b64,
+        "branch": GH_BRANCH,
+    }
+    if sha:
+        payload["sha"] = sha
+    return await _with_backoff(lambda: gh_client.put(_contents_url(), json=payload))
+
+LOG_HEADER = b"ts_iso;ip;manufacturer;product;extra;code;duty;vat;user_agent\n"
+
+_LOG_STATE: Dict[str, Any] = {"sha": None, "data": None}
+
+def _row_line(row: list[str]) -> str:
+    return ";".join(row) + "\r\n"
+
+async def _load_log_state() -> bool:
+    rget = await _get_contents()
+    if rget.status_code == 200:
+        js = rget.json()
+        old_b64 = js.get("content", "")
+        if old_b64 or not js.get("size"):
+            data = bytearray(base64.b64decode(old_b64)) if old_b64 else bytearray()
+        else:
+            rblob = await _get_blob(js["sha"])
+            if rblob.status_code != 200:
+                print("[logs->github] blob GET error:", rblob.status_code, rblob.text[:200])
+                return False
+            data = bytearray(rblob.content)
+        _LOG_STATE["sha"] = js.get("sha")
+        _LOG_STATE["data"] = data
+        return True
+    if rget.status_code in (404, 409):
+        _LOG_STATE["sha"] = None
+        _LOG_STATE["data"] = bytearray()
+        return True
+    print("[logs->github] GET error:", rget.status_code, rget.text[:200])
+    return False
+
+async def append_rows_and_push_to_github(rows: list[list[str]]) -> bool:
+    if _LOG_STATE["data"] is None and not await _load_log_state():
+        return False
+
+    new_lines = "".join(_row_line(row) for row in rows).encode("utf-8")
+
+    message = f"append log {rows[0][0]} (+{len(rows) - 1})" if len(rows) > 1 else f"append log {rows[0][0]}"
+    for attempt in range(2):
+        # Extend the cached file in place and cut the new rows off again if the PUT fails.
+        buf = _LOG_STATE["data"]
+        if not buf:
+            buf += LOG_HEADER
+        mark = len(buf)
+        buf += new_lines
+        content_b64 = base64.b64encode(buf).decode("ascii")
+
+        try:
+            rput = await _put_contents(content_b64, _LOG_STATE["sha"], message=message if not attempt else f"{message} (retry)")
+        except BaseException:
+            del buf[mark:]
+            raise
+        if rput.status_code in (200, 201):
+            _LOG_STATE["sha"] = rput.json()["content"]["sha"]
+            return True
+        del buf[mark:]
+        if rput.status_code != 409 or attempt:
+            break
+        if not await _load_log_state():
+            return False
+    print("[logs->github] PUT error:", rput.status_code, rput.text[:200])
+    return False
+
+LOG_QUEUE: "asyncio.Queue[list[str]]" = asyncio.Queue()
+_LOG_PENDING: list[list[str]] = []
+_log_flusher: Optional[asyncio.Task] = None
+_log_stopping = False
+_log_spool: Optional[TextIO] = None
+
+def _open_spool() -> None:
+    global _log_spool
+    if not LOG_SPOOL_PATH:
+        return
+    if fcntl is None:
+        print("[logs] spool disabled: file locking is not available")
+        return
+    f = open(LOG_SPOOL_PATH, "a+", encoding="utf-8", newline="", buffering=1)
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        print("[logs] spool disabled: held by another process")
+        return
+    f.seek(0)
+    _LOG_PENDING.extend(line.rstrip("\r\n").split(";") for line in f if line.strip())
+    if _LOG_PENDING:
+        print("[logs] replaying", len(_LOG_PENDING), "spooled rows")
+    _log_spool = f
+
+def _rewrite_spool() -> None:
+    if _log_spool is None:
+        return
+    try:
+        _log_spool.seek(0)
+        _log_spool.truncate()
+        _log_spool.write("".join(_row_line(row) for row in _LOG_PENDING))
+    except OSError as e:
+        print("[logs] spool error:", e)
+
+def append_row(row: list[str]) -> None:
+    if not (GH_TOKEN and GH_OWNER and GH_REPO):
+        return
+    if _log_spool is not None:
+        _log_spool.write(_row_line(row))
+    LOG_QUEUE.put_nowait(row)
+
+async def _flush_log_buffer() -> bool:
+    while not LOG_QUEUE.empty():
+        _LOG_PENDING.append(LOG_QUEUE.get_nowait())
+    if not _LOG_PENDING:
+        return True
+    rows = _LOG_PENDING[:]
+    try:
+        ok = await append_rows_and_push_to_github(rows)
+    except Exception as e:
+        print("[logs] error:", e)
+        ok = False
+    if ok:
+        del _LOG_PENDING[:len(rows)]
+        while not LOG_QUEUE.empty():
+            _LOG_PENDING.append(LOG_QUEUE.get_nowait())
+        _rewrite_spool()
+    return ok
+
+async def _log_flush_loop() -> None:
+    loop = asyncio.get_running_loop()
+    while not _log_stopping:
+        deadline = loop.time() + LOG_FLUSH_INTERVAL
+        while len(_LOG_PENDING) < LOG_FLUSH_ROWS and not _log_stopping:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                _LOG_PENDING.append(await asyncio.wait_for(LOG_QUEUE.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        if not await _flush_log_buffer():
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+
+async def start_log_flusher() -> None:
+    global _log_flusher
+    if GH_TOKEN and GH_OWNER and GH_REPO:
+        try:
+            _open_spool()
+            await _load_log_state()
+        except Exception as e:
+            print("[logs] error:", e)
+    _log_flusher = asyncio.create_task(_log_flush_loop())
+
+async def stop_log_flusher() -> None:
+    global _log_stopping
+    _log_stopping = True
+    if _log_flusher:
+        _log_flusher.cancel()
+        try:
+            await _log_flusher
+        except asyncio.CancelledError:
+            pass
+    await _flush_log_buffer()
+    if _log_spool is not None:
+        _log_spool.close()
+    await gh_client.aclose()
@@ -0,0 +1,280 @@
+import os, time
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from async_lru import alru_cache
+import orjson
+
+from .clients import OPENAI_SEM, client
+from .github_log import append_row, start_log_flusher, stop_log_flusher
+from .sqlite_log import insert_row, start_sqlite_log, stop_sqlite_log
+from .models import DetectIn, DetectOut, LLMDetectOut, BatchOut, BatchItemOut, BatchStatusOut
+from .parsing import DegradedReply, _clean_field, _build_detect_out, _cache_key, _output_text, _take_10digits
+
+DETECT_CACHE_SIZE = int(os.getenv("DETECT_CACHE_SIZE", "10000"))
+DETECT_CACHE_TTL  = float(os.getenv("DETECT_CACHE_TTL", "86400"))
+# Cheap first pass without tools; empty DETECT_MODEL goes straight to the search model.
+DETECT_MODEL        = os.getenv("DETECT_MODEL", "gpt-4o-mini")
+DETECT_SEARCH_MODEL = os.getenv("DETECT_SEARCH_MODEL", "gpt-5")
+
+_DETECT_STATS = {"calls": 0, "escalated": 0}
+
+DETECT_FORMAT = {
+    "type": "json_schema",
+    "name": "tnved_detect",
+    "strict": True,
+    "schema": LLMDetectOut.model_json_schema(),
+}
+
+app = FastAPI()
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.on_event("startup")
+async def _startup():
+    start_sqlite_log()
+    await start_log_flusher()
+
+@app.on_event("shutdown")
+async def _close_clients():
+    await stop_log_flusher()
+    await stop_sqlite_log()
+    await client.close()
+
+SYSTEM_MSG = """Ты — эксперт по классификации товаров по ТН ВЭД ЕАЭС и по подготовке текстов для графы 31 декларации на товары.
+    Ты — эксперт по классификации товаров по ТН ВЭД ЕАЭС и по подготовке текстов для графы 31 декларации на товары.
+    Твоя задача: по краткому описанию товара определить наиболее вероятный 10-значный код ТН ВЭД ЕАЭС, указать ставки платежей и сформировать подробное техническое описание товара.
+    Если предоставленной информации недостаточно для уверенной классификации (нет назначения, материалов, электрических параметров, области применения и т.п.), ты должен сначала получить недостающие сведения через web-поиск по типовым описаниям схожих товаров и уже на основе найденного сформировать итоговое описание. Используй только общедоступные и типовые характеристики, не выдумывай конкретные модели и бренды, если их нет во входных данных. Делай оговорки: «по типовым техническим характеристикам для такого вида товара».
+    Результат верни строго в виде одного json-объекта
+    Структура JSON (поля на русском):
+    
+    {
+      "code": "10-значный код или \"UNKNOWN\"",
+      "duty": "проценты или \"UNKNOWN\"",
+      "vat": "проценты или \"UNKNOWN\"",
+      "tech31": "подробное структурированное техописание: 1) назначение; 2) конструкция и материалы; 3) основные технические/электрические параметры (если применимо); 4) условия эксплуатации; 5) комплектация. Объем не меньше 100 слов. Если часть данных взята из типовых открытых источников — так и укажи.",
+      "decl31": "готовая формулировка для графы 31 декларации на товары, краткая, без лишних пояснений, в одном абзаце, с указанием основных отличительных признаков и назначения. Без слов «примерно», «возможно», «как правило».",
+      "classification_reason": "обоснование выбора позиции ТН ВЭД (ОПИ, примечания к группе/товарной позиции, признаки товара). Если есть неопределенность — укажи диапазон возможных кодов и чего не хватает.",
+      "alternatives": [
+        {"code": "возможный_код", "reason": "в каких случаях применим"}
+      ],
+      "payments": {
+        "duty": "% или \"UNKNOWN\"",
+        "vat": "% или \"UNKNOWN\"",
+        "excise": "— или значение",
+        "fees": "— или значение"
+      },
+      "requirements": [
+        "ТР ЕАЭС, безопасность, лицензирование, сертификация — если применимо"
+      ],
+      "sources": [
+        "краткие ссылки/названия найденных источников, если делался веб-поиск"
+      ]
+    }
+    
+    Требования:
+    - не добавляй никаких комментариев вне JSON;
+    - не меняй имена полей;
+    - если веб-поиск не дал точных параметров — пиши «по типовым характеристикам для данного вида товара».
+    
+    """
+
+def _compose_full(inp: DetectIn) -> str:
+    full = (inp.product or "").strip()
+    if inp.extra and inp.extra.strip().lower() != "null":
+        full += f" ({inp.extra.strip()})"
+    if inp.manufacturer and inp.manufacturer.strip().lower() != "null":
+        full += f" — Производитель: {inp.manufacturer.strip()}"
+    return full
+
+def _responses_body(full: str, search: bool = True) -> Dict[str, Any]:
+    user_msg = (
+    "Определи 10-значный код ТН ВЭД для товара и верни результат СТРОГО в виде JSON.\n"
+    "Вход:\n"
+    f"{orjson.dumps({'Наименование': full}).decode()}")
+    body = {
+        "model": DETECT_MODEL,
+        "text": {"format": DETECT_FORMAT},
+        "input": [
+            {"role": "system", "content": SYSTEM_MSG},
+            {"role": "user", "content": user_msg},
+        ],
+    }
+    if search:
+        body["model"] = DETECT_SEARCH_MODEL
+        body["tools"] = [{"type": "web_search"}]
+        body["reasoning"] = {"effort": "medium"}
+    return body
+
+async def _ask(body: Dict[str, Any]) -> DetectOut:
+    async with OPENAI_SEM:
+        resp = await client.responses.create(**body)
+    return _build_detect_out((resp.output_text or "").strip(), strict=True)
+
+# A DegradedReply is raised rather than returned so alru_cache does not keep it.
+@alru_cache(maxsize=DETECT_CACHE_SIZE, ttl=DETECT_CACHE_TTL)
+async def _classify(full: str) -> DetectOut:
+    _DETECT_STATS["calls"] += 1
+    if DETECT_MODEL:
+        try:
+            out = await _ask(_responses_body(full, search=False))
+            if _take_10digits(out.code):
+                return out
+        except DegradedReply:
+            pass
+        _DETECT_STATS["escalated"] += 1
+    return await _ask(_responses_body(full))
+
+_LAST_S = 0
+_LAST_STR = ""
+
+def _now_str() -> str:
+    global _LAST_S, _LAST_STR
+    s = int(time.time())
+    if s != _LAST_S:
+        _LAST_STR = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(s))
+        _LAST_S = s
+    return _LAST_STR
+
+async def _log_detect(inp: DetectIn, out: DetectOut, request: Request) -> None:
+    try:
+        ts = _now_str()
+        ip = request.client.host if request.client else ""
+        ua = request.headers.get("user-agent", "")
+        
+        row = [
+            ts,
+            _clean_field(ip),
+            _clean_field(inp.manufacturer),
+            _clean_field(inp.product),
+            _clean_field(inp.extra),
+            _clean_field(out.code),
+            _clean_field(out.duty),
+            _clean_field(out.vat),
+            _clean_field(ua),
+        ]
+        append_row(row)
+        insert_row(row)
+    except Exception as e:
+        print("[logs] error:", e)
+
+@app.post("/tnved/detect", response_model=DetectOut)
+async def detect(inp: DetectIn, request: Request, debug: bool = Query(False)):
+    full = _compose_full(inp)
+    if not full:
+        raise HTTPException(status_code=400, detail="Поля пустые")
+
+    try:
+        out = await _classify(_cache_key(full))
+    except DegradedReply as e:
+        out = e.out
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Ошибка GPT API: {e}")
+
+    await _log_detect(inp, out, request)
+    return out if debug else out.model_copy(update={"raw": None})
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+@app.post("/tnved/detect/stream")
+async def detect_stream(inp: DetectIn, request: Request, debug: bool = Query(False)):
+    full = _compose_full(inp)
+    if not full:
+        raise HTTPException(status_code=400, detail="Поля пустые")
+
+    async def events():
+        chunks = []
+        try:
+            async with OPENAI_SEM:
+                stream = await client.responses.create(**_responses_body(_cache_key(full)), stream=True)
+                async for ev in stream:
+                    if ev.type == "response.output_text.delta":
+                        chunks.append(ev.delta)
+                        yield _sse("delta", {"text": ev.delta})
+                    elif ev.type in ("response.failed", "error"):
+                        raise RuntimeError(getattr(ev, "message", None) or ev.type)
+        except Exception as e:
+            yield _sse("error", {"detail": f"Ошибка GPT API: {e}"})
+            return
+
+        out = _build_detect_out("".join(chunks).strip())
+        yield _sse("result", out.model_dump(exclude=None if debug else {"raw"}))
+        await _log_detect(inp, out, request)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/tnved/batch", response_model=BatchOut)
+async def batch_detect(items: List[DetectIn]):
+    if not items:
+        raise HTTPException(status_code=400, detail="Поля пустые")
+
+    lines = []
+    for i, inp in enumerate(items):
+        full = _compose_full(inp)
+        if not full:
+            raise HTTPException(status_code=400, detail=f"Поля пустые (#{i})")
+        lines.append(orjson.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": _responses_body(full),
+        }))
+
+    try:
+        f = await client.files.create(
+            file=("tnved_batch.jsonl", b"\n".join(lines) + b"\n"),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=f.id,
+            endpoint="/v1/responses",
+            completion_window="24h",
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Ошибка GPT API: {e}")
+
+    return BatchOut(id=batch.id, status=batch.status)
+
+async def _read_batch_file(file_id: str) -> List[BatchItemOut]:
+    content = await client.files.content(file_id)
+    results = []
+    for line in content.content.splitlines():
+        if not line.strip():
+            continue
+        item = orjson.loads(line)
+        resp = item.get("response") or {}
+        err = item.get("error")
+        if not err and resp.get("status_code") == 200:
+            text = _output_text(resp.get("body") or {}).strip()
+            results.append(BatchItemOut(custom_id=item.get("custom_id", ""), result=_build_detect_out(text)))
+            continue
+        if not err:
+            err = (resp.get("body") or {}).get("error") or resp.get("status_code")
+        results.append(BatchItemOut(custom_id=item.get("custom_id", ""), error=str(err)))
+    return results
+
+@app.get("/tnved/batch/{batch_id}", response_model=BatchStatusOut)
+async def batch_status(batch_id: str):
+    try:
+        batch = await client.batches.retrieve(batch_id)
+        results = None
+        if batch.status == "completed":
+            results = []
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    results += await _read_batch_file(file_id)
+            results.sort(key=lambda r: int(r.custom_id) if r.custom_id.isdigit() else 0)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Ошибка GPT API: {e}")
+    return BatchStatusOut(id=batch.id, status=batch.status, results=results)
+
+@app.get("/")
+def root():
+    return {"status": "ok", "service": "tnved-api", "time": _now_str(), "detect": _DETECT_STATS}
@@ -0,0 +1,95 @@
+from typing import Optional, List
+
+from pydantic import BaseModel, ConfigDict
+
+class DetectIn(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    manufacturer: str
+    product: str
+    extra: Optional[str] = None
+
+class AltItem(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    code: Optional[str] = None
+    reason: Optional[str] = None
+
+class Payments(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    duty: Optional[str] = None
+    vat: Optional[str] = None
+    excise: Optional[str] = None
+    fees: Optional[str] = None
+
+class DetectOut(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    code: str
+    duty: str
+    vat: str
+    raw: Optional[str] = None
+    description: Optional[str] = None
+    tech31: Optional[str] = None
+    classification_reason: Optional[str] = None
+    alternatives: Optional[List[AltItem]] = None
+    payments: Optional[Payments] = None
+    requirements: Optional[List[str]] = None
+
+# Shape of the model's own JSON reply. Every field is required and objects are
+# closed, so model_json_schema() is accepted as a strict json_schema format.
+_LLM_CONFIG = ConfigDict(
+    extra="ignore",
+    frozen=True,
+    str_strip_whitespace=True,
+    json_schema_extra={"additionalProperties": False},
+)
+
+class LLMAltItem(BaseModel):
+    model_config = _LLM_CONFIG
+
+    code: str
+    reason: str
+
+class LLMPayments(BaseModel):
+    model_config = _LLM_CONFIG
+
+    duty: str
+    vat: str
+    excise: str
+    fees: str
+
+class LLMDetectOut(BaseModel):
+    model_config = _LLM_CONFIG
+
+    code: str
+    duty: str
+    vat: str
+    tech31: str
+    decl31: str
+    classification_reason: str
+    alternatives: List[LLMAltItem]
+    payments: LLMPayments
+    requirements: List[str]
+    sources: List[str]
+
+class BatchOut(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    id: str
+    status: str
+
+class BatchItemOut(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    custom_id: str
+    result: Optional[DetectOut] = None
+    error: Optional[str] = None
+
+class BatchStatusOut(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    id: str
+    status: str
+    results: Optional[List[BatchItemOut]] = None
@@ -0,0 +1,86 @@
+import re, unicodedata
+from typing import Dict, Any
+
+from pydantic import ValidationError
+
+from .models import AltItem, DetectOut, LLMDetectOut, Payments
+
+def _clean_field(val) -> str:
+    if val is None:
+        return ""
+    s = str(val).replace(";", ",").replace('"', "'")
+    return " ".join(s.split())
+
+# Same result as stripping spaces and searching for \b\d{10}\b, without the copy:
+# the code must not touch another word character, spaces aside.
+TEN_DIGITS = re.compile(r"(?:^|[^\w ]) *(\d(?: *\d){9})(?! *\w)")
+PERCENT_RE = re.compile(r"\d+(?:\.\d+)?")
+
+def _take_10digits(s: str) -> str:
+    if not s:
+        return ""
+    m = TEN_DIGITS.search(s)
+    return m.group(1).replace(" ", "") if m else ""
+
+def _norm_percent(s: str) -> str:
+    if not s:
+        return ""
+    s = s.strip().replace(",", ".")
+    m = PERCENT_RE.search(s)
+    return (m.group(0) + "%") if m else ""
+
+class DegradedReply(Exception):
+    """The reply did not match the schema; ``out`` is the best-effort result."""
+
+    def __init__(self, out: DetectOut):
+        super().__init__("reply does not match the schema")
+        self.out = out
+
+def _build_detect_out(text: str, strict: bool = False) -> DetectOut:
+    try:
+        data = LLMDetectOut.model_validate_json(text)
+    except ValidationError:
+        out = DetectOut(
+            code=_take_10digits(text) or "UNKNOWN",
+            duty="UNKNOWN",
+            vat="UNKNOWN",
+            raw=text,
+            description="",
+            tech31="",
+            classification_reason="",
+            alternatives=[],
+            payments=Payments(duty="UNKNOWN", vat="UNKNOWN", excise="—", fees="—"),
+            requirements=[],
+        )
+        if strict:
+            raise DegradedReply(out)
+        return out
+
+    code = data.code
+    if not _take_10digits(code) and not code.upper().startswith("UNKNOWN"):
+        code = ""
+
+    return DetectOut(
+        code=code or "UNKNOWN",
+        duty=_norm_percent(data.duty) or "UNKNOWN",
+        vat=_norm_percent(data.vat) or "UNKNOWN",
+        raw=text,
+        description="",
+        tech31=data.tech31,
+        classification_reason=data.classification_reason,
+        alternatives=[AltItem(code=a.code, reason=a.reason) for a in data.alternatives],
+        payments=Payments(**data.payments.model_dump()),
+        requirements=[r for r in data.requirements if r],
+    )
+
+def _cache_key(full: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", full).split())
+
+def _output_text(body: Dict[str, Any]) -> str:
+    return "".join(
+        part.get("text", "")
+        for item in body.get("output") or []
+        if item.get("type") == "message"
+        for part in item.get("content") or []
+        if part.get("type") == "output_text"
+    )
@@ -0,0 +1,65 @@
+import os, asyncio, sqlite3
+from typing import Optional
+
+# Local append-only log next to the GitHub archive; empty path disables it.
+LOG_SQLITE_PATH = os.getenv("LOG_SQLITE_PATH", "")
+
+LOG_COLUMNS = ("ts_iso", "ip", "manufacturer", "product", "extra", "code", "duty", "vat", "user_agent")
+
+_INSERT_SQL = f"INSERT INTO logs ({', '.join(LOG_COLUMNS)}) VALUES ({', '.join('?' * len(LOG_COLUMNS))})"
+
+SQLITE_QUEUE: "asyncio.Queue[Optional[list[str]]]" = asyncio.Queue()
+_db: Optional[sqlite3.Connection] = None
+_sqlite_writer: Optional[asyncio.Task] = None
+
+def _insert_many(rows: list[list[str]]) -> None:
+    with _db:
+        _db.executemany(_INSERT_SQL, rows)
+
+async def _sqlite_write_loop() -> None:
+    # The only user of _db, so inserts never overlap.
+    stopping = False
+    while not stopping:
+        rows = []
+        item = await SQLITE_QUEUE.get()
+        while True:
+            if item is None:
+                stopping = True
+            else:
+                rows.append(item)
+            if SQLITE_QUEUE.empty():
+                break
+            item = SQLITE_QUEUE.get_nowait()
+        if rows:
+            try:
+                await asyncio.to_thread(_insert_many, rows)
+            except sqlite3.Error as e:
+                print("[logs->sqlite] error:", e)
+
+def insert_row(row: list[str]) -> None:
+    if _db is None:
+        return
+    SQLITE_QUEUE.put_nowait(row)
+
+def start_sqlite_log() -> None:
+    global _db, _sqlite_writer
+    if not LOG_SQLITE_PATH:
+        return
+    db = sqlite3.connect(LOG_SQLITE_PATH, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute(f"CREATE TABLE IF NOT EXISTS logs ({', '.join(c + ' TEXT' for c in LOG_COLUMNS)})")
+    db.commit()
+    _db = db
+    _sqlite_writer = asyncio.create_task(_sqlite_write_loop())
+
+async def stop_sqlite_log() -> None:
+    global _db, _sqlite_writer
+    if _sqlite_writer is not None:
+        # Drain what is queued instead of cancelling mid-insert.
+        SQLITE_QUEUE.put_nowait(None)
+        await _sqlite_writer
+        _sqlite_writer = None
+    if _db is not None:
+        _db.close()
+        _db = None